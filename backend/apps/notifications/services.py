@@ -20,22 +20,23 @@ class TelegramNotificationService:
     """Сервис для отправки уведомлений в Telegram"""
     
     def __init__(self):
-        self.bot_token = settings.TELEGRAM_BOT_TOKEN
+        # Токен читается из настроек один раз; пустая строка приравнивается к отсутствию токена
+        self.bot_token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None) or None
         self.bot = None
-        if self.bot_token:
+        if self.bot_token is not None:
             self.bot = Bot(token=self.bot_token)
     
     def _check_bot_available(self) -> bool:
         """Проверить доступность бота"""
-        if not self.bot_token:
-            logger.warning("TELEGRAM_BOT_TOKEN не настроен")
-            return False
+        available = self.bot_token is not None and self.bot is not None
         
-        if not self.bot:
-            logger.error("Telegram Bot не инициализирован")
-            return False
+        if not available:
+            if self.bot_token is None:
+                logger.warning("TELEGRAM_BOT_TOKEN не настроен")
+            else:
+                logger.error("Telegram Bot не инициализирован")
         
-        return True
+        return available
     
     def _get_user_preferences(self, user: User) -> Optional[UserNotificationPreferences]:
         """Получить настройки уведомлений пользователя"""
@@ -52,6 +53,10 @@ class TelegramNotificationService:
                 }
             )
     
+    def _find_user_preferences(self, user_id: int) -> Optional[UserNotificationPreferences]:
+        """Найти настройки уведомлений пользователя без создания настроек по умолчанию"""
+        return UserNotificationPreferences.objects.filter(user_id=user_id).first()
+    
     def _create_notification_log(self, user: User, notification_type: str, 
                                message: str, chat_id: str, 
                                object_type: str = None, object_id: int = None) -> NotificationLog:
@@ -84,7 +89,12 @@ class TelegramNotificationService:
         
         try:
             user = User.objects.get(id=user_id)
-            preferences = self._get_user_preferences(user)
+            preferences = self._find_user_preferences(user_id)
+            
+            if preferences is None:
+                # Настройки по умолчанию отключают Telegram, создавать их незачем
+                logger.info(f"Настройки уведомлений не заданы для пользователя {user.username}")
+                return False
             
             if not preferences.should_send_notification('status_update', is_urgent):
                 logger.info(f"Уведомление о статусе отключено для пользователя {user.username}")
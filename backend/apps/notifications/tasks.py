@@ -22,7 +22,10 @@ def send_telegram_message(self, notification_log_id: int):
     Отправить сообщение в Telegram с retry логикой и exponential backoff
     """
     try:
-        log = NotificationLog.objects.get(id=notification_log_id)
+        # Пользователь и его настройки нужны при ошибке Forbidden - загружаем одним JOIN
+        log = NotificationLog.objects.select_related(
+            'user', 'user__notification_preferences'
+        ).get(id=notification_log_id)
         
         if not settings.TELEGRAM_BOT_TOKEN:
             log.status = 'failed'
@@ -2,7 +2,10 @@
 Service layer для модуля склада
 Содержит бизнес-логику и интеграции между модулями
 """
+import bisect
+import functools
 import logging
+import re
 from decimal import Decimal
 from django.db import transaction
 from django.contrib.auth.models import User
@@ -16,6 +19,25 @@ from apps.laboratory.models import LabTestRequest
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны размеров проката: (признак формы, тип, ключ размера)
+# Круглый прокат: ⌀50, d50, диаметр 50
+# Листовой прокат: лист 10мм, 10x1000x2000
+_SIZE_PATTERNS = (
+    (re.compile(r'⌀|^d|диаметр'), 'круглый', 'diameter'),
+    (re.compile(r'лист|x'), 'лист', 'thickness'),
+)
+_SIZE_NUMBER_RE = re.compile(r'\d+')
+
+
+def _build_range_index(ranges: Dict[tuple, Any]) -> tuple:
+    """Индекс непересекающихся диапазонов {(min, max): значение} для поиска через bisect"""
+    items = sorted(ranges.items())
+    return (
+        tuple(low for (low, _), _ in items),
+        tuple(high for (_, high), _ in items),
+        tuple(value for _, value in items),
+    )
+
 
 class ServiceResponse:
     """Стандартизированный формат ответа сервисов"""
@@ -75,34 +97,75 @@ class MaterialInspectionService:
         }
     }
     
-    # Материалы требующие ППСД
-    PPSD_REQUIRED_GRADES = [
+    # Индекс диапазонов УЗК по форме проката (строится один раз из матрицы)
+    _ULTRASONIC_INDEX = {
+        form: _build_range_index(ranges)
+        for form, dimensions in ULTRASONIC_REQUIREMENTS.items()
+        for ranges in dimensions.values()
+    }
+    
+    # Материалы требующие ППСД (марки в верхнем регистре)
+    PPSD_REQUIRED_GRADES = frozenset({
         '12X18H10T', '08X18H10T', '10X17H13M2T', 
         '03X17H14M3', '20X13', '40X13'
-    ]
+    })
     
     @staticmethod
     def _parse_size(size: str) -> Dict[str, Any]:
         """Парсинг размера материала"""
         size = size.lower().strip()
         
-        # Круглый прокат: ⌀50, d50, диаметр 50
-        if '⌀' in size or size.startswith('d') or 'диаметр' in size:
-            import re
-            match = re.search(r'(\d+)', size)
-            if match:
-                diameter = int(match.group(1))
-                return {'type': 'круглый', 'diameter': diameter}
+        for form_re, size_type, key in _SIZE_PATTERNS:
+            if form_re.search(size):
+                match = _SIZE_NUMBER_RE.search(size)
+                if match:
+                    return {'type': size_type, key: int(match.group())}
+                break
         
-        # Листовой прокат: лист 10мм, 10x1000x2000
-        elif 'лист' in size or 'x' in size:
-            import re
-            match = re.search(r'(\d+)', size)
-            if match:
-                thickness = int(match.group(1))
-                return {'type': 'лист', 'thickness': thickness}
+        return {'type': 'неизвестный', 'raw': size}
+    
+    @classmethod
+    def _lookup_ultrasonic(cls, form: str, dimension: int):
+        """Марки, требующие УЗК для размера проката, или None если диапазон не найден"""
+        index = cls._ULTRASONIC_INDEX.get(form)
+        if index is None:
+            return None
         
-        return {'type': 'unknown', 'raw': size}
+        lows, highs, values = index
+        position = bisect.bisect_right(lows, dimension) - 1
+        if position >= 0 and dimension < highs[position]:
+            return values[position]
+        return None
+    
+    @classmethod
+    @functools.lru_cache(maxsize=512)
+    def _check_ppsd_cached(cls, material_grade: str, size: Optional[str]) -> tuple:
+        """
+        Кэшируемая часть проверки ППСД (чистая функция от марки и размера)
+        
+        Returns:
+            Кортеж (requires_ppsd, reasons) с неизменяемым списком причин
+        """
+        # Базовая проверка по марке
+        requires_ppsd = material_grade.upper() in cls.PPSD_REQUIRED_GRADES
+        
+        reasons = []
+        if requires_ppsd:
+            reasons.append(f"Марка {material_grade} входит в список материалов, требующих ППСД")
+        
+        # Дополнительные проверки по размеру (если указан)
+        if size:
+            size_info = cls._parse_size(size)
+            
+            # Для больших размеров может потребоваться ППСД
+            if size_info['type'] == 'круглый' and size_info.get('diameter', 0) > 200:
+                requires_ppsd = True
+                reasons.append(f"Большой диаметр ({size_info['diameter']}мм) требует ППСД")
+            elif size_info['type'] == 'лист' and size_info.get('thickness', 0) > 50:
+                requires_ppsd = True
+                reasons.append(f"Большая толщина листа ({size_info['thickness']}мм) требует ППСД")
+        
+        return requires_ppsd, tuple(reasons)
     
     @classmethod
     def check_ppsd_requirement(cls, material_grade: str, size: str = None) -> ServiceResponse:
@@ -119,30 +182,13 @@ class MaterialInspectionService:
         try:
             logger.info(f"Проверка ППСД для материала {material_grade}, размер: {size}")
             
-            # Базовая проверка по марке
-            requires_ppsd = material_grade.upper() in [grade.upper() for grade in cls.PPSD_REQUIRED_GRADES]
-            
-            reasons = []
-            if requires_ppsd:
-                reasons.append(f"Марка {material_grade} входит в список материалов, требующих ППСД")
-            
-            # Дополнительные проверки по размеру (если указан)
-            if size:
-                size_info = cls._parse_size(size)
-                
-                # Для больших размеров может потребоваться ППСД
-                if size_info['type'] == 'круглый' and size_info.get('diameter', 0) > 200:
-                    requires_ppsd = True
-                    reasons.append(f"Большой диаметр ({size_info['diameter']}мм) требует ППСД")
-                elif size_info['type'] == 'лист' and size_info.get('thickness', 0) > 50:
-                    requires_ppsd = True
-                    reasons.append(f"Большая толщина листа ({size_info['thickness']}мм) требует ППСД")
+            requires_ppsd, reasons = cls._check_ppsd_cached(material_grade, size)
             
             return ServiceResponse.success_response({
                 'requires_ppsd': requires_ppsd,
                 'material_grade': material_grade,
                 'size': size,
-                'reasons': reasons
+                'reasons': list(reasons)
             })
             
         except Exception as e:
@@ -170,23 +216,19 @@ class MaterialInspectionService:
             
             if size_info['type'] == 'круглый':
                 diameter = size_info.get('diameter', 0)
+                grades = cls._lookup_ultrasonic('круглый', diameter)
                 
-                for (min_d, max_d), grades in cls.ULTRASONIC_REQUIREMENTS['круглый']['диаметр_мм'].items():
-                    if min_d <= diameter < max_d:
-                        if grades == 'all' or material_grade.upper() in [g.upper() for g in grades]:
-                            requires_ultrasonic = True
-                            reasons.append(f"Диаметр {diameter}мм и марка {material_grade} требуют УЗК")
-                        break
+                if grades is not None and (grades == 'all' or material_grade.upper() in [g.upper() for g in grades]):
+                    requires_ultrasonic = True
+                    reasons.append(f"Диаметр {diameter}мм и марка {material_grade} требуют УЗК")
                         
             elif size_info['type'] == 'лист':
                 thickness = size_info.get('thickness', 0)
+                grades = cls._lookup_ultrasonic('лист', thickness)
                 
-                for (min_t, max_t), grades in cls.ULTRASONIC_REQUIREMENTS['лист']['толщина_мм'].items():
-                    if min_t <= thickness < max_t:
-                        if grades == 'all' or material_grade.upper() in [g.upper() for g in grades]:
-                            requires_ultrasonic = True
-                            reasons.append(f"Толщина {thickness}мм и марка {material_grade} требуют УЗК")
-                        break
+                if grades is not None and (grades == 'all' or material_grade.upper() in [g.upper() for g in grades]):
+                    requires_ultrasonic = True
+                    reasons.append(f"Толщина {thickness}мм и марка {material_grade} требуют УЗК")
             
             return ServiceResponse.success_response({
                 'requires_ultrasonic': requires_ultrasonic,
@@ -4,6 +4,7 @@ Pytest configuration and fixtures for MetalQMS tests
 import pytest
 import os
 import django
+from contextlib import ExitStack
 from unittest.mock import patch, MagicMock
 
 # Configure Django settings
@@ -96,11 +97,19 @@ def lab_test(material_receipt):
 
 
 @pytest.fixture(autouse=True)
-def mock_external_services():
+def mock_external_services(request):
     """Mock external services for all tests"""
-    with patch('apps.warehouse.models.qrcode.QRCode') as mock_qr, \
-         patch('apps.notifications.services.Bot') as mock_bot, \
-         patch('apps.notifications.tasks.Bot') as mock_task_bot:
+    # TelegramBotClassPatchMixin classes patch services.Bot once per class
+    class_patched_bot = request.node.get_closest_marker('class_patched_telegram_bot') is not None
+    
+    with ExitStack() as stack:
+        mock_qr = stack.enter_context(patch('apps.warehouse.models.material.qrcode.QRCode'))
+        mock_task_bot = stack.enter_context(patch('apps.notifications.tasks.Bot'))
+        if class_patched_bot:
+            from apps.notifications import services
+            mock_bot = services.Bot
+        else:
+            mock_bot = stack.enter_context(patch('apps.notifications.services.Bot'))
         
         # Setup QR code mock
         mock_qr_instance = MagicMock()
@@ -110,7 +119,8 @@ def mock_external_services():
         
         # Setup Telegram bot mock
         mock_bot_instance = MagicMock()
-        mock_bot.return_value = mock_bot_instance
+        if not class_patched_bot:
+            mock_bot.return_value = mock_bot_instance
         mock_task_bot.return_value = mock_bot_instance
         
         yield {
@@ -120,6 +130,30 @@ def mock_external_services():
         }
 
 
+@pytest.fixture(autouse=True, scope='session')
+def mock_telegram_task_delay():
+    """Keep notification tasks out of the Celery eager path for the whole session"""
+    from apps.notifications.tasks import send_telegram_message
+    
+    with patch.object(send_telegram_message, 'delay', MagicMock()) as mock_delay:
+        yield mock_delay
+
+
+@pytest.fixture(autouse=True)
+def reset_telegram_task_delay(mock_telegram_task_delay):
+    """Start every test with a clean call history on the session-wide delay mock"""
+    mock_telegram_task_delay.reset_mock()
+    yield mock_telegram_task_delay
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear the local memory cache so cached values don't leak between tests"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+
+
 @pytest.fixture
 def mock_telegram_settings():
     """Mock Telegram settings"""
@@ -157,15 +191,6 @@ def test_database():
         yield
 
 
-@pytest.fixture(scope='session')
-def django_db_setup():
-    """Setup test database"""
-    settings.DATABASES['default'] = {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
-    }
-
-
 @pytest.fixture
 def mock_file_upload():
     """Mock file upload for tests"""
@@ -223,6 +248,9 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "workflow: marks tests as workflow tests"
     )
+    config.addinivalue_line(
+        "markers", "class_patched_telegram_bot: Telegram Bot is patched once per test class"
+    )
 
 
 @pytest.fixture
@@ -25,6 +25,8 @@ class UserFactory(factory.django.DjangoModelFactory):
         model = User
     
     username = factory.Sequence(lambda n: f"user{n}")
+    # Explicit unusable password: tests authenticate with API tokens, never with passwords
+    password = '!'
     email = factory.LazyAttribute(lambda obj: f"{obj.username}@metalqms.test")
     first_name = factory.Faker('first_name')
     last_name = factory.Faker('last_name')
@@ -222,15 +224,19 @@ class NotificationPreferencesFactory(factory.django.DjangoModelFactory):
     user = factory.SubFactory(UserFactory)
     telegram_chat_id = factory.Sequence(lambda n: str(100000 + n))
     is_telegram_enabled = True
+    # Same shape as UserNotificationPreferences.set_notification_preference() writes
     notification_types = factory.LazyFunction(
         lambda: {
-            'status_update': True,
-            'task_assignment': True,
-            'daily_summary': False,
-            'urgent_alert': True,
-            'sla_warning': True,
-            'quality_alert': True,
-            'workflow_complete': False
+            notification_type: {'enabled': enabled, 'urgent_only': False}
+            for notification_type, enabled in (
+                ('status_update', True),
+                ('task_assignment', True),
+                ('daily_summary', False),
+                ('urgent_alert', True),
+                ('sla_warning', True),
+                ('quality_alert', True),
+                ('workflow_complete', False),
+            )
         }
     )
 
@@ -270,7 +276,13 @@ class UrgentMaterialFactory(MaterialFactory):
 
 
 class CompleteMaterialWorkflowFactory(MaterialFactory):
-    """Factory that creates a complete workflow for a material"""
+    """
+    Factory that creates a complete workflow for a material.
+    
+    Created objects are attached to the material instance as
+    ``_test_certificate``, ``_test_receipt``, ``_test_inspection`` and
+    ``_test_lab_requests`` so tests can inspect them without extra queries.
+    """
     
     @factory.post_generation
     def create_complete_workflow(self, create, extracted, **kwargs):
@@ -279,16 +291,19 @@ class CompleteMaterialWorkflowFactory(MaterialFactory):
         
         # Create certificate (without PDF processing to avoid Celery issues)
         with patch('apps.certificates.tasks.process_uploaded_certificate'):
-            CertificateFactory(material=self)
+            self._test_certificate = CertificateFactory(material=self)
         
         # Create receipt
         receipt = MaterialReceiptFactory(material=self, status='pending_qc')
+        self._test_receipt = receipt
         
         # Create QC inspection
         qc_inspection = QCInspectionFactory(
             material_receipt=receipt,
             status='completed'
         )
+        self._test_inspection = qc_inspection
+        self._test_lab_requests = []
         
         # Create lab tests if PPSD required
         if qc_inspection.requires_ppsd:
@@ -311,6 +326,7 @@ class CompleteMaterialWorkflowFactory(MaterialFactory):
                 test_request=mech_request,
                 conclusion='passed'
             )
+            self._test_lab_requests = [chem_request, mech_request]
         
         # Create workflow process
         # MaterialInspectionProcessFactory(
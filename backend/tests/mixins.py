@@ -1,6 +1,7 @@
 """
 Test mixins and utilities for MetalQMS tests
 """
+import pytest
 from unittest.mock import patch, MagicMock
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
@@ -20,7 +21,7 @@ class MockExternalServicesMixin:
     
     def setup_mocks(self):
         """Setup all external service mocks"""
-        self.qr_code_patcher = patch('apps.warehouse.models.qrcode.QRCode')
+        self.qr_code_patcher = patch('apps.warehouse.models.material.qrcode.QRCode')
         self.telegram_bot_patcher = patch('apps.notifications.services.Bot')
         self.telegram_task_patcher = patch('apps.notifications.tasks.Bot')
         self.reportlab_patcher = patch('reportlab.pdfgen.canvas.Canvas')
@@ -70,6 +71,24 @@ class MockExternalServicesMixin:
         self.reportlab_patcher.stop()
 
 
+class TelegramBotClassPatchMixin:
+    """Mixin to patch Telegram Bot once per test class instead of per test"""
+    
+    # Exempts the class from the per-test Bot patch in conftest.mock_external_services
+    pytestmark = pytest.mark.class_patched_telegram_bot
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.telegram_bot_patcher = patch('apps.notifications.services.Bot')
+        cls.mock_telegram_bot = cls.telegram_bot_patcher.start()
+        cls.addClassCleanup(cls.telegram_bot_patcher.stop)
+        super().setUpClass()
+    
+    def setUp(self):
+        super().setUp()
+        self.mock_telegram_bot.reset_mock(return_value=True)
+
+
 class AuthenticatedAPITestMixin:
     """Mixin for API tests with authentication"""
     
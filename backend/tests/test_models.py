@@ -78,8 +78,8 @@ class MaterialModelTest(TestCase):
         # This doesn't raise error at model level, but will at serializer level
         material2.save()  # This succeeds at model level
     
-    @patch('apps.warehouse.models.qrcode.QRCode')
-    @patch('apps.warehouse.models.File')
+    @patch('apps.warehouse.models.material.qrcode.QRCode')
+    @patch('apps.warehouse.models.material.File')
     def test_qr_code_generation(self, mock_file, mock_qr_code):
         """Test QR code generation functionality"""
         # Setup mocks
@@ -205,9 +205,17 @@ class MaterialModelTest(TestCase):
 class MaterialReceiptModelTest(TestCase):
     """Test MaterialReceipt model functionality"""
     
+    @classmethod
+    def setUpTestData(cls):
+        cls.material = MaterialFactory(material_grade='40X')
+        cls.receipt = MaterialReceiptFactory(
+            material=cls.material,
+            document_number='RCP-123456'
+        )
+    
     def test_material_receipt_creation(self):
         """Test creating material receipt"""
-        receipt = MaterialReceiptFactory()
+        receipt = self.receipt
         
         self.assertIsNotNone(receipt.id)
         self.assertIsNotNone(receipt.material)
@@ -216,23 +224,28 @@ class MaterialReceiptModelTest(TestCase):
     
     def test_material_receipt_str_representation(self):
         """Test receipt string representation"""
-        receipt = MaterialReceiptFactory(
-            document_number='RCP-123456',
-            material__material_grade='40X'
-        )
-        
         # Check that string representation contains expected information
-        str_repr = str(receipt)
+        str_repr = str(self.receipt)
         self.assertIn('RCP-123456', str_repr)
-        self.assertIn(receipt.material.material_grade, str_repr)
+        self.assertIn(self.material.material_grade, str_repr)
 
 
 class QCInspectionModelTest(TestCase):
     """Test QCInspection model logic"""
     
+    @classmethod
+    def setUpTestData(cls):
+        # Material with PPSD-required grade shared by all tests in the class
+        cls.material = PPSDRequiredMaterialFactory(material_grade='12X18H10T')
+        cls.receipt = MaterialReceiptFactory(material=cls.material)
+        cls.inspection = QCInspectionFactory(
+            material_receipt=cls.receipt,
+            status='draft'
+        )
+    
     def test_qc_inspection_creation(self):
         """Test creating QC inspection"""
-        inspection = QCInspectionFactory()
+        inspection = self.inspection
         
         self.assertIsNotNone(inspection.id)
         self.assertIsNotNone(inspection.material_receipt)
@@ -241,18 +254,14 @@ class QCInspectionModelTest(TestCase):
     
     def test_ppsd_requirement_for_stainless_steel(self):
         """Test PPSD requirement for stainless steel grades"""
-        # Create material with PPSD-required grade
-        material = PPSDRequiredMaterialFactory(material_grade='12X18H10T')
-        receipt = MaterialReceiptFactory(material=material)
-        inspection = QCInspectionFactory(material_receipt=receipt)
-        
         # Check if PPSD is required based on material grade
         ppsd_grades = ['12X18H10T', '08X18H10T', '10X17H13M2T', '03X17H14M3', '20X13', '40X13']
-        self.assertIn(material.material_grade, ppsd_grades)
+        self.assertIn(self.material.material_grade, ppsd_grades)
+        self.assertTrue(self.inspection.requires_ppsd)
     
     def test_inspection_status_transitions(self):
         """Test valid status transitions"""
-        inspection = QCInspectionFactory(status='draft')
+        self.assertEqual(self.inspection.status, 'draft')
         
         # Valid transitions
         valid_transitions = {
@@ -262,29 +271,36 @@ class QCInspectionModelTest(TestCase):
             'rejected': []    # Final state
         }
         
-        self.assertIn('in_progress', valid_transitions['draft'])
+        self.assertIn('in_progress', valid_transitions[self.inspection.status])
         self.assertIn('completed', valid_transitions['in_progress'])
 
 
 class LabTestRequestModelTest(TestCase):
     """Test LabTestRequest model functionality"""
     
+    REQUIREMENTS_TEXT = "Проверить химический состав согласно ГОСТ"
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.material = MaterialFactory()
+        cls.receipt = MaterialReceiptFactory(material=cls.material)
+        cls.test_request = LabTestRequestFactory(
+            material_receipt=cls.receipt,
+            test_requirements=cls.REQUIREMENTS_TEXT
+        )
+    
     def test_lab_test_request_creation(self):
         """Test creating laboratory test request"""
-        test_request = LabTestRequestFactory()
+        test_request = self.test_request
         
         self.assertIsNotNone(test_request.id)
-        self.assertIsNotNone(test_request.material_receipt)
+        self.assertEqual(test_request.material_receipt, self.receipt)
         self.assertIsNotNone(test_request.requested_by)
         self.assertIn(test_request.test_type, ['chemical_analysis', 'mechanical_properties', 'ultrasonic'])
     
     def test_test_requirements_field(self):
         """Test that test requirements are properly stored"""
-        test_requirements = "Проверить химический состав согласно ГОСТ"
-        
-        test_request = LabTestRequestFactory(test_requirements=test_requirements)
-        
-        self.assertEqual(test_request.test_requirements, test_requirements)
+        self.assertEqual(self.test_request.test_requirements, self.REQUIREMENTS_TEXT)
 
 
 class WorkflowModelTest(TestCase):
@@ -304,18 +320,33 @@ class WorkflowModelTest(TestCase):
         """Test complete workflow factory creates all related objects"""
         material = CompleteMaterialWorkflowFactory()
         
-        # Verify all related objects were created
-        self.assertTrue(Certificate.objects.filter(material=material).exists())
-        self.assertTrue(MaterialReceipt.objects.filter(material=material).exists())
+        if not hasattr(material, '_test_receipt'):
+            # Factory did not attach created objects - query them back
+            self.assertTrue(Certificate.objects.filter(material=material).exists())
+            self.assertTrue(MaterialReceipt.objects.filter(material=material).exists())
+            
+            receipt = MaterialReceipt.objects.get(material=material)
+            self.assertTrue(QCInspection.objects.filter(material_receipt=receipt).exists())
+            
+            qc_inspection = QCInspection.objects.get(material_receipt=receipt)
+            if qc_inspection.requires_ppsd:
+                self.assertTrue(LabTestRequest.objects.filter(material_receipt=receipt).exists())
+            return
         
-        receipt = MaterialReceipt.objects.get(material=material)
-        self.assertTrue(QCInspection.objects.filter(material_receipt=receipt).exists())
+        # Verify all related objects were created
+        self.assertIsNotNone(material._test_certificate)
+        self.assertEqual(material._test_certificate.material, material)
+        self.assertIsNotNone(material._test_receipt)
+        self.assertEqual(material._test_receipt.material, material)
+        
+        qc_inspection = material._test_inspection
+        self.assertIsNotNone(qc_inspection)
+        self.assertEqual(qc_inspection.material_receipt, material._test_receipt)
         # self.assertTrue(MaterialInspectionProcess.objects.filter(material_receipt=receipt).exists())  # Temporarily disabled
         
         # Check if lab tests were created for PPSD materials
-        qc_inspection = QCInspection.objects.get(material_receipt=receipt)
         if qc_inspection.requires_ppsd:
-            self.assertTrue(LabTestRequest.objects.filter(material_receipt=receipt).exists())
+            self.assertTrue(material._test_lab_requests)
 
 
 class MaterialValidationTest(TestCase):
@@ -376,16 +407,17 @@ class MaterialQuerySetTest(TestCase):
         """Test queryset optimization with prefetch_related"""
         material = CompleteMaterialWorkflowFactory()
         
-        # Test optimized query
-        materials = Material.objects.prefetch_related(
-            'certificate_set',
-            'materialreceipt_set'
-        ).filter(id=material.id)
-        
-        self.assertTrue(materials.exists())
-        
-        # Test that prefetched data is available
-        material_with_prefetch = materials.first()
-        with self.assertNumQueries(0):  # Should not trigger additional queries
-            list(material_with_prefetch.certificate_set.all())
-            list(material_with_prefetch.materialreceipt_set.all())
\ No newline at end of file
+        # Main query + one query per prefetched relation; accessing the
+        # prefetched data must not trigger additional queries
+        with self.assertNumQueries(3):
+            materials = list(
+                Material.objects.prefetch_related(
+                    'certificate',
+                    'receipts'
+                ).filter(id=material.id)
+            )
+            material_with_prefetch = materials[0]
+            material_with_prefetch.certificate
+            list(material_with_prefetch.receipts.all())
+        
+        self.assertEqual(material_with_prefetch.id, material.id)
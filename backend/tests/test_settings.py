@@ -5,7 +5,10 @@ from config.settings import *
 import tempfile
 import os
 
-# Database
+import django
+from django.db.backends.signals import connection_created
+
+# Database - in-memory SQLite, separate in every pytest-xdist worker process
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -13,6 +16,28 @@ DATABASES = {
     }
 }
 
+# SQLite tuning - tests never need durability of the throwaway database
+SQLITE_TEST_PRAGMAS = (
+    'PRAGMA synchronous=OFF',
+    'PRAGMA journal_mode=MEMORY',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',
+)
+
+if django.VERSION >= (5, 1):
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': '; '.join(SQLITE_TEST_PRAGMAS),
+    }
+else:
+    # SQLite backend supports OPTIONS['init_command'] only since Django 5.1
+    def _apply_sqlite_pragmas(sender, connection, **kwargs):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                for pragma in SQLITE_TEST_PRAGMAS:
+                    cursor.execute(pragma)
+
+    connection_created.connect(_apply_sqlite_pragmas, dispatch_uid='sqlite_test_pragmas')
+
 # Disable migrations for faster tests
 class DisableMigrations:
     def __contains__(self, item):
@@ -48,16 +73,21 @@ LOGGING = {
 # Test-specific settings
 DEBUG = False
 TEMPLATE_DEBUG = False
+DEBUG_PROPAGATE_EXCEPTIONS = True
 
 # Password hashers - use fast hasher for tests
+# (UserFactory stores an unusable password, so factories never hash at all)
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
 
-# Cache - use dummy cache
+# Cache - use local memory cache
+# In-process cache keeps the real caching code paths active; it is cleared
+# before every test by the clear_cache fixture in conftest.py
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-cache',
     }
 }
 
@@ -81,10 +111,11 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 CSRF_COOKIE_SECURE = False
 SESSION_COOKIE_SECURE = False
 
-# Test-specific apps
-INSTALLED_APPS += [
-    'tests',
-]
+# Test-specific apps (settings may be imported more than once per worker)
+if 'tests' not in INSTALLED_APPS:
+    INSTALLED_APPS += [
+        'tests',
+    ]
 
 # DRF test settings
 REST_FRAMEWORK.update({
@@ -98,9 +129,6 @@ REST_FRAMEWORK.update({
 USE_I18N = False
 USE_L10N = False
 
-# Test runner
-TEST_RUNNER = 'django.test.runner.DiscoverRunner'
-
 # Factory Boy settings
 FACTORY_FOR_DJANGO_MODELS = True
 
@@ -1,17 +1,57 @@
 """
 Test utilities and helper functions
 """
+import functools
 import json
 import tempfile
-from decimal import Decimal
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-from unittest.mock import MagicMock, patch
+from io import BytesIO
+from contextlib import contextmanager
+from typing import Dict, Any
+from unittest.mock import Mock, patch
 
-from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.utils import timezone
-from rest_framework.test import APIClient
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+import qrcode
+from reportlab.pdfgen import canvas
+from telegram import Bot
+
+
+# Default payloads for TestDataHelper; callers always receive a fresh dict
+_MATERIAL_TEMPLATE: Dict[str, Any] = {
+    'material_grade': '40X',
+    'supplier': 'МеталлТорг',
+    'order_number': 'ORD-123456',
+    'certificate_number': 'CERT-123456',
+    'heat_number': 'HEAT-123456',
+    'size': '⌀100',
+    'quantity': '250.500',
+    'unit': 'kg',
+    'location': 'Секция А-1'
+}
+
+_QC_TEMPLATE: Dict[str, Any] = {
+    'visual_inspection_passed': True,
+    'dimensional_check_passed': True,
+    'marking_check_passed': True,
+    'documentation_check_passed': True,
+    'requires_ppsd': False,
+    'comments': 'Test inspection'
+}
+
+# test_results is nested and mutable, so it is copied per call
+_LAB_TEMPLATE: Dict[str, Any] = {
+    'test_type': 'chemical_analysis',
+    'test_results': {
+        'carbon': 0.25,
+        'manganese': 1.2,
+        'silicon': 0.8
+    },
+    'equipment_used': 'Спектрометр АRL-01',
+    'status': 'completed'
+}
 
 
 class TestDataHelper:
@@ -20,98 +60,107 @@ class TestDataHelper:
     @staticmethod
     def create_material_data(**overrides) -> Dict[str, Any]:
         """Create material data dictionary"""
-        data = {
-            'material_grade': '40X',
-            'supplier': 'МеталлТорг',
-            'order_number': 'ORD-123456',
-            'certificate_number': 'CERT-123456',
-            'heat_number': 'HEAT-123456',
-            'size': '⌀100',
-            'quantity': '250.500',
-            'unit': 'kg',
-            'location': 'Секция А-1'
-        }
-        data.update(overrides)
-        return data
+        return {**_MATERIAL_TEMPLATE, **overrides}
     
     @staticmethod
     def create_qc_inspection_data(**overrides) -> Dict[str, Any]:
         """Create QC inspection data dictionary"""
-        data = {
-            'visual_inspection_passed': True,
-            'dimensional_check_passed': True,
-            'marking_check_passed': True,
-            'documentation_check_passed': True,
-            'requires_ppsd': False,
-            'comments': 'Test inspection'
-        }
-        data.update(overrides)
-        return data
+        return {**_QC_TEMPLATE, **overrides}
     
     @staticmethod
     def create_lab_test_data(**overrides) -> Dict[str, Any]:
         """Create laboratory test data dictionary"""
-        data = {
-            'test_type': 'chemical_analysis',
-            'test_results': {
-                'carbon': 0.25,
-                'manganese': 1.2,
-                'silicon': 0.8
-            },
-            'equipment_used': 'Спектрометр АRL-01',
-            'status': 'completed'
+        return {
+            **_LAB_TEMPLATE,
+            'test_results': dict(_LAB_TEMPLATE['test_results']),
+            **overrides
         }
-        data.update(overrides)
-        return data
+
+
+def _configure_qr_code(mock_qr):
+    """Make QRCode() return an instance whose make_image() yields a mock image"""
+    mock_qr_instance = Mock(spec_set=qrcode.QRCode)
+    mock_qr.return_value = mock_qr_instance
+    mock_qr_instance.make_image.return_value = Mock()
+
+
+def _configure_telegram_bot(mock_bot):
+    """Make Bot() return an instance whose send_message() succeeds"""
+    mock_bot_instance = Mock(spec_set=Bot)
+    mock_bot.return_value = mock_bot_instance
+    
+    # Bot methods are coroutines in python-telegram-bot v20, so the spec would
+    # make send_message() an AsyncMock; the tasks call it synchronously
+    mock_bot_instance.send_message = Mock(return_value=Mock(message_id=123))
+
+
+def _configure_pdf_canvas(mock_canvas):
+    """Make Canvas() return a mock canvas instance"""
+    mock_canvas.return_value = Mock(spec_set=canvas.Canvas)
 
 
 class MockHelper:
     """Helper class for creating mocks"""
     
+    @staticmethod
+    @contextmanager
+    def _mock_target(path, configure=None):
+        """Patch path for the duration of the block, optionally configuring the mock"""
+        with patch(path) as mock_target:
+            if configure is not None:
+                configure(mock_target)
+            yield mock_target
+    
     @staticmethod
     def mock_qr_code_generation():
         """Create QR code generation mock"""
-        with patch('apps.warehouse.models.qrcode.QRCode') as mock_qr:
-            mock_qr_instance = MagicMock()
-            mock_qr.return_value = mock_qr_instance
-            
-            mock_img = MagicMock()
-            mock_qr_instance.make_image.return_value = mock_img
-            
-            yield mock_qr
+        return MockHelper._mock_target('apps.warehouse.models.material.qrcode.QRCode', _configure_qr_code)
     
     @staticmethod
     def mock_telegram_bot():
         """Create Telegram bot mock"""
-        with patch('apps.notifications.services.Bot') as mock_bot:
-            mock_bot_instance = MagicMock()
-            mock_bot.return_value = mock_bot_instance
-            
-            # Mock successful message sending
-            mock_message = MagicMock()
-            mock_message.message_id = 123
-            mock_bot_instance.send_message.return_value = mock_message
-            
-            yield mock_bot
+        return MockHelper._mock_target('apps.notifications.services.Bot', _configure_telegram_bot)
     
     @staticmethod
     def mock_pdf_generation():
         """Create PDF generation mock"""
-        with patch('reportlab.pdfgen.canvas.Canvas') as mock_canvas:
-            mock_canvas_instance = MagicMock()
-            mock_canvas.return_value = mock_canvas_instance
-            yield mock_canvas
+        return MockHelper._mock_target('reportlab.pdfgen.canvas.Canvas', _configure_pdf_canvas)
+
+
+# Minimal valid PDF structure
+_DEFAULT_PDF_BYTES = b'%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n'
+
+# ZIP-like header for Office docs
+_DOCUMENT_BYTES = b'PK\x03\x04' + b'test document content'
+
+# Encoded test images by format, filled on first use
+_CACHED_IMAGES: Dict[str, bytes] = {}
+
+
+def _encode_test_image(format: str) -> bytes:
+    """Encode the simple colored test image in the given format"""
+    img = Image.new('RGB', (100, 100), color='red')
+    buffer = BytesIO()
+    img.save(buffer, format=format)
+    return buffer.getvalue()
 
 
 class FileHelper:
     """Helper class for file operations in tests"""
     
+    @staticmethod
+    @contextmanager
+    def temp_workspace():
+        """Route MEDIA_ROOT to a temporary directory removed when the block exits"""
+        with tempfile.TemporaryDirectory(prefix='metal2-tests-') as workspace:
+            with override_settings(MEDIA_ROOT=workspace):
+                yield workspace
+    
     @staticmethod
     def create_test_pdf(filename='test.pdf', content=None):
         """Create test PDF file"""
         if content is None:
-            # Minimal valid PDF structure
-            content = b'%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n'
+            content = _DEFAULT_PDF_BYTES
         
         return SimpleUploadedFile(
             filename,
@@ -122,36 +171,30 @@ class FileHelper:
     @staticmethod
     def create_test_image(filename='test.jpg', format='JPEG'):
         """Create test image file"""
-        from PIL import Image
-        from io import BytesIO
-        
-        # Create simple colored image
-        img = Image.new('RGB', (100, 100), color='red')
-        buffer = BytesIO()
-        img.save(buffer, format=format)
-        buffer.seek(0)
-        
-        content_type = f'image/{format.lower()}'
-        if format.lower() == 'jpeg':
-            content_type = 'image/jpeg'
+        content = _CACHED_IMAGES.get(format)
+        if content is None:
+            content = _CACHED_IMAGES[format] = _encode_test_image(format)
         
         return SimpleUploadedFile(
             filename,
-            buffer.read(),
-            content_type=content_type
+            content,
+            content_type=f'image/{format.lower()}'
         )
     
     @staticmethod
     def create_test_document(filename='test.docx'):
         """Create test document file"""
-        content = b'PK\x03\x04' + b'test document content'  # ZIP-like header for Office docs
         return SimpleUploadedFile(
             filename,
-            content,
+            _DOCUMENT_BYTES,
             content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
         )
 
 
+# Keys present in every paginated DRF response
+_PAGINATED_KEYS = frozenset({'results', 'count', 'next', 'previous'})
+
+
 class APITestHelper:
     """Helper class for API testing"""
     
@@ -165,10 +208,7 @@ class APITestHelper:
     @staticmethod
     def assert_paginated_response(test_case, response, expected_count=None):
         """Assert paginated response structure"""
-        test_case.assertIn('results', response.data)
-        test_case.assertIn('count', response.data)
-        test_case.assertIn('next', response.data)
-        test_case.assertIn('previous', response.data)
+        test_case.assertGreaterEqual(response.data.keys(), _PAGINATED_KEYS)
         
         if expected_count is not None:
             test_case.assertEqual(len(response.data['results']), expected_count)
@@ -182,65 +222,75 @@ class APITestHelper:
             test_case.assertIn(error_field, response.data)
 
 
+@functools.lru_cache(maxsize=1)
+def _complete_workflow_json() -> str:
+    """Serialized complete workflow data, built once per test run"""
+    return json.dumps({
+        'material': TestDataHelper.create_material_data(
+            material_grade='12X18H10T'  # PPSD required
+        ),
+        'receipt': {
+            'document_number': 'RCP-WORKFLOW',
+            'supplier_delivery_note': 'DEL-WORKFLOW'
+        },
+        'qc_inspection': TestDataHelper.create_qc_inspection_data(
+            requires_ppsd=True
+        ),
+        'lab_tests': [
+            TestDataHelper.create_lab_test_data(
+                test_type='chemical_analysis'
+            ),
+            TestDataHelper.create_lab_test_data(
+                test_type='mechanical_properties',
+                test_results={
+                    'tensile_strength': 650,
+                    'yield_strength': 450,
+                    'elongation': 25
+                }
+            )
+        ]
+    })
+
+
 class WorkflowTestHelper:
     """Helper class for workflow testing"""
     
+    _MODELS = None
+    
     @staticmethod
     def create_complete_workflow_data():
         """Create data for complete workflow test"""
-        return {
-            'material': TestDataHelper.create_material_data(
-                material_grade='12X18H10T'  # PPSD required
-            ),
-            'receipt': {
-                'document_number': 'RCP-WORKFLOW',
-                'supplier_delivery_note': 'DEL-WORKFLOW'
-            },
-            'qc_inspection': TestDataHelper.create_qc_inspection_data(
-                requires_ppsd=True
-            ),
-            'lab_tests': [
-                TestDataHelper.create_lab_test_data(
-                    test_type='chemical_analysis'
-                ),
-                TestDataHelper.create_lab_test_data(
-                    test_type='mechanical_properties',
-                    test_results={
-                        'tensile_strength': 650,
-                        'yield_strength': 450,
-                        'elongation': 25
-                    }
-                )
-            ]
-        }
+        # Decoding a fresh copy gives every caller its own mutable tree
+        return json.loads(_complete_workflow_json())
     
-    @staticmethod
-    def assert_workflow_completion(test_case, material):
+    @classmethod
+    def _get_models(cls):
+        """Import workflow models once, after Django apps are ready"""
+        if cls._MODELS is None:
+            from apps.warehouse.models import MaterialReceipt
+            from apps.quality.models import QCInspection
+            from apps.laboratory.models import LabTestRequest
+            
+            cls._MODELS = (MaterialReceipt, QCInspection, LabTestRequest)
+        return cls._MODELS
+    
+    @classmethod
+    def assert_workflow_completion(cls, test_case, material):
         """Assert that complete workflow was executed"""
-        from apps.warehouse.models import MaterialReceipt
-        from apps.quality.models import QCInspection
-        from apps.laboratory.models import LaboratoryTest
+        MaterialReceipt, QCInspection, LabTestRequest = cls._get_models()
         
         # Check material receipt exists
-        test_case.assertTrue(
-            MaterialReceipt.objects.filter(material=material).exists(),
-            "Material receipt should exist"
-        )
-        
-        receipt = MaterialReceipt.objects.get(material=material)
+        receipt = MaterialReceipt.objects.filter(material=material).first()
+        test_case.assertIsNotNone(receipt, "Material receipt should exist")
         
         # Check QC inspection exists
-        test_case.assertTrue(
-            QCInspection.objects.filter(material_receipt=receipt).exists(),
-            "QC inspection should exist"
-        )
-        
-        qc_inspection = QCInspection.objects.get(material_receipt=receipt)
+        qc_inspection = QCInspection.objects.filter(material_receipt=receipt).first()
+        test_case.assertIsNotNone(qc_inspection, "QC inspection should exist")
         
         # Check lab tests if PPSD required
         if qc_inspection.requires_ppsd:
             test_case.assertTrue(
-                LaboratoryTest.objects.filter(material_receipt=receipt).exists(),
+                LabTestRequest.objects.filter(material_receipt=receipt).exists(),
                 "Laboratory tests should exist for PPSD materials"
             )
 
@@ -251,24 +301,28 @@ class ValidationTestHelper:
     @staticmethod
     def test_required_fields(test_case, url, method, required_fields, auth_client):
         """Test that required fields are properly validated"""
+        base_data = TestDataHelper.create_material_data()
+        client_method = getattr(auth_client, method.lower())
+        
         for field in required_fields:
             with test_case.subTest(field=field):
-                data = TestDataHelper.create_material_data()
-                data[field] = ''  # Empty required field
+                data = {**base_data, field: ''}  # Empty required field
                 
-                response = getattr(auth_client, method.lower())(url, data, format='json')
+                response = client_method(url, data, format='json')
                 test_case.assertEqual(response.status_code, 400)
                 test_case.assertIn(field, response.data)
     
     @staticmethod
     def test_invalid_choices(test_case, url, method, choice_fields, auth_client):
         """Test validation of choice fields"""
+        base_data = TestDataHelper.create_material_data()
+        client_method = getattr(auth_client, method.lower())
+        
         for field, invalid_value in choice_fields.items():
             with test_case.subTest(field=field):
-                data = TestDataHelper.create_material_data()
-                data[field] = invalid_value
+                data = {**base_data, field: invalid_value}
                 
-                response = getattr(auth_client, method.lower())(url, data, format='json')
+                response = client_method(url, data, format='json')
                 test_case.assertEqual(response.status_code, 400)
                 test_case.assertIn(field, response.data)
 
@@ -279,51 +333,41 @@ class PerformanceTestHelper:
     @staticmethod
     def measure_query_count(test_case, func, expected_max_queries=None):
         """Measure and assert query count"""
-        from django.test.utils import override_settings
-        from django.db import connection
-        
-        with override_settings(DEBUG=True):
-            initial_query_count = len(connection.queries)
+        with CaptureQueriesContext(connection) as context:
             func()
-            final_query_count = len(connection.queries)
-            
-            actual_queries = final_query_count - initial_query_count
-            
-            if expected_max_queries is not None:
-                test_case.assertLessEqual(
-                    actual_queries, 
-                    expected_max_queries,
-                    f"Expected max {expected_max_queries} queries, got {actual_queries}"
-                )
-            
-            return actual_queries
+        
+        actual_queries = len(context)
+        
+        if expected_max_queries is not None:
+            test_case.assertLessEqual(
+                actual_queries, 
+                expected_max_queries,
+                f"Expected max {expected_max_queries} queries, got {actual_queries}"
+            )
+        
+        return actual_queries
     
     @staticmethod
     def assert_no_n_plus_one(test_case, queryset_func, iteration_func):
         """Assert that there's no N+1 query problem"""
-        from django.test.utils import override_settings
-        from django.db import connection
+        # Fetch up to 5 items in one query, outside both measurements
+        items = list(queryset_func()[:5])
         
-        with override_settings(DEBUG=True):
-            # Get baseline query count for first item
-            connection.queries_log.clear()
-            queryset = queryset_func()
-            first_item = queryset.first()
-            if first_item:
-                iteration_func(first_item)
-            baseline_queries = len(connection.queries)
-            
-            # Test with multiple items
-            connection.queries_log.clear()
-            items = list(queryset[:5])  # Get 5 items
+        # Get baseline query count for first item
+        with CaptureQueriesContext(connection) as baseline:
+            if items:
+                iteration_func(items[0])
+        baseline_queries = len(baseline)
+        
+        # Test with multiple items
+        with CaptureQueriesContext(connection) as multi:
             for item in items:
                 iteration_func(item)
-            
-            multi_queries = len(connection.queries)
-            
-            # Should not scale linearly with number of items
-            test_case.assertLessEqual(
-                multi_queries,
-                baseline_queries + 2,  # Allow small variance
-                f"Possible N+1 query problem: {multi_queries} queries for 5 items vs {baseline_queries} for 1 item"
-            )
\ No newline at end of file
+        multi_queries = len(multi)
+        
+        # Should not scale linearly with number of items
+        test_case.assertLessEqual(
+            multi_queries,
+            baseline_queries + 2,  # Allow small variance
+            f"Possible N+1 query problem: {multi_queries} queries for 5 items vs {baseline_queries} for 1 item"
+        )
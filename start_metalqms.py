@@ -7,13 +7,21 @@
 Версия: 1.0.0
 """
 
+import asyncio
 import os
 import sys
 import time
 import subprocess
-import threading
+import shutil
 import signal
+import sqlite3
+import socket
+import functools
+import hashlib
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 
@@ -33,9 +41,17 @@ def print_colored(text, color=Colors.OKGREEN):
     """Печать цветного текста"""
     print(f"{color}{text}{Colors.ENDC}")
 
-def print_banner():
-    """Печать баннера приложения"""
-    banner = """
+def _encode_colored(text, color):
+    """Цветной текст в байтах для вывода одной записью"""
+    return f"{color}{text}{Colors.ENDC}\n".encode(sys.stdout.encoding or 'utf-8', errors='replace')
+
+def write_bytes(data):
+    """Вывод заранее подготовленных байтов одной записью"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
+
+BANNER = """
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                                                                              ║
 ║    🏭 MetalQMS - Система управления качеством металлообработки               ║
@@ -46,40 +62,89 @@ def print_banner():
 ║                                                                              ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
     """
-    print_colored(banner, Colors.HEADER)
+_BANNER_BYTES = _encode_colored(BANNER, Colors.HEADER)
+
+def print_banner():
+    """Печать баннера приложения"""
+    write_bytes(_BANNER_BYTES)
+
+async def wait_port(host, port, timeout=30):
+    """Ожидание, пока порт начнет принимать TCP соединения"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 0.2)
+        except (OSError, asyncio.TimeoutError):
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return True
+    return False
+
+@functools.lru_cache(maxsize=None)
+def _executable(name):
+    """
+    Полный путь к исполняемому файлу из PATH или None
+    
+    shutil.which учитывает PATHEXT, поэтому npm.cmd на Windows запускается
+    без промежуточного shell, как и на POSIX
+    """
+    return shutil.which(name)
+
+@functools.lru_cache(maxsize=None)
+def _probe(cmd):
+    """
+    Запуск команды проверки версии (результат кэшируется на время запуска)
+    
+    Возвращает (код возврата, вывод); код возврата None - команда не найдена
+    """
+    executable = _executable(cmd[0])
+    if executable is None:
+        return None, ''
+    
+    try:
+        result = subprocess.run([executable, *cmd[1:]], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None, ''
+    
+    # Проверяем и stdout и stderr, npm иногда выводит в stderr
+    return result.returncode, result.stdout.strip() or result.stderr.strip()
 
 def check_dependencies():
     """Проверка зависимостей"""
     print_colored("🔍 Проверка зависимостей...", Colors.OKCYAN)
     
     dependencies = {
-        'python': 'python --version',
-        'node': 'node --version', 
-        'npm': 'npm --version'
+        'python': ('python', '--version'),
+        'node': ('node', '--version'), 
+        'npm': ('npm', '--version')
     }
     
+    # Проверки независимы и ждут дочерние процессы - запускаем их параллельно
+    with ThreadPoolExecutor(max_workers=len(dependencies)) as executor:
+        futures = {dep: executor.submit(_probe, cmd) for dep, cmd in dependencies.items()}
+    
     missing = []
-    for dep, cmd in dependencies.items():
+    for dep, future in futures.items():
         try:
-            result = subprocess.run(cmd.split(), capture_output=True, text=True, shell=True)
-            
-            # Проверяем и stdout и stderr, npm иногда выводит в stderr
-            version = result.stdout.strip() or result.stderr.strip()
+            returncode, version = future.result()
             
+            if returncode is None:
+                print_colored(f"  ❌ {dep}: команда не найдена", Colors.FAIL)
+                missing.append(dep)
             # Если команда выполнилась успешно (код возврата 0), считаем что зависимость найдена
-            if result.returncode == 0:
+            elif returncode == 0:
                 if version:
                     print_colored(f"  ✅ {dep}: {version}", Colors.OKGREEN)
                 else:
                     # Даже если вывода нет, но код возврата 0 - зависимость найдена
                     print_colored(f"  ✅ {dep}: найден (версию определить не удалось)", Colors.OKGREEN)
             else:
-                print_colored(f"  ❌ {dep}: не установлен (код ошибки: {result.returncode})", Colors.FAIL)
+                print_colored(f"  ❌ {dep}: не установлен (код ошибки: {returncode})", Colors.FAIL)
                 missing.append(dep)
                 
-        except FileNotFoundError:
-            print_colored(f"  ❌ {dep}: команда не найдена", Colors.FAIL)
-            missing.append(dep)
         except Exception as e:
             print_colored(f"  ❌ {dep}: ошибка проверки ({str(e)})", Colors.FAIL)
             missing.append(dep)
@@ -97,26 +162,81 @@ def check_dependencies():
     
     return True
 
+ENVIRONMENT_DIRECTORIES = (
+    'logs',
+    'media/qr_codes',
+    'media/certificates',
+    'media/test_results',
+    'uploads/certificates',
+    'uploads/test_results',
+    'backups',
+)
+
 def setup_environment():
     """Настройка окружения"""
     print_colored("\n⚙️  Настройка окружения...", Colors.OKCYAN)
     
-    # Создание необходимых директорий
-    directories = [
-        'logs',
-        'media',
-        'media/qr_codes',
-        'media/certificates', 
-        'media/test_results',
-        'uploads',
-        'uploads/certificates',
-        'uploads/test_results',
-        'backups'
-    ]
+    # Создание необходимых директорий: только листовые, родительские
+    # (media, uploads) создаются вместе с ними
+    for directory in ENVIRONMENT_DIRECTORIES:
+        os.makedirs(directory, exist_ok=True)
     
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
-        print_colored(f"  📁 Создана директория: {directory}", Colors.OKGREEN)
+    print_colored(f"  📁 Директории готовы: {', '.join(ENVIRONMENT_DIRECTORIES)}", Colors.OKGREEN)
+
+# Кэш результатов проверок между запусками
+STARTUP_CACHE_FILE = Path('logs') / '.startup_cache.json'
+STARTUP_CACHE_TTL = 24 * 60 * 60  # 24 часа
+
+# Файл окружения backend, который читает environ.Env.read_env() в config/settings.py
+BACKEND_ENV_FILE = Path('backend') / 'config' / '.env'
+
+# Файлы, без которых установка зависимостей и загрузка данных бессмысленны
+REQUIREMENTS_FILE = 'requirements.txt'
+TEST_DATA_FIXTURE = 'fixtures/test_data.json'  # относительно backend
+
+# Директории, в которых не бывает миграций проекта
+_FINGERPRINT_SKIP_DIRS = {'__pycache__', 'node_modules', 'static', 'media', '.git', 'venv', '.venv'}
+
+def load_startup_cache():
+    """Загрузка кэша проверок запуска"""
+    try:
+        return json.loads(STARTUP_CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def save_startup_cache(cache):
+    """Сохранение кэша проверок запуска"""
+    try:
+        STARTUP_CACHE_FILE.write_text(json.dumps(cache), encoding='utf-8')
+    except OSError:
+        pass
+
+def _iter_migration_files(path):
+    """Рекурсивный обход файлов миграций через os.scandir"""
+    in_migrations = os.path.basename(path) == 'migrations'
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _FINGERPRINT_SKIP_DIRS:
+                    yield from _iter_migration_files(entry.path)
+            elif in_migrations and entry.name.endswith('.py'):
+                yield entry
+
+def _migrations_fingerprint(backend_dir):
+    """Отпечаток миграций, manage.py и config/.env: путь, время изменения и размер файлов"""
+    entries = [
+        (entry.path, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in _iter_migration_files(backend_dir)
+    ]
+    for path in (os.path.join(backend_dir, 'manage.py'), str(BACKEND_ENV_FILE)):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            entries.append((path, stat.st_mtime_ns, stat.st_size))
+    
+    digest = hashlib.blake2b(digest_size=16)
+    for entry in sorted(entries):
+        digest.update(repr(entry).encode())
+    return digest.hexdigest()
 
 def check_database():
     """Проверка базы данных"""
@@ -127,58 +247,76 @@ def check_database():
         print_colored("  ❌ Директория backend не найдена", Colors.FAIL)
         return False
     
+    # Миграции не менялись с последней успешной проверки той же базы - Django не запускаем;
+    # удаленная или пересозданная база проверяется заново
+    cache = load_startup_cache()
+    cached_check = cache.get('database', {})
+    database_identity = _database_identity()
+    if (database_identity is not None
+            and cached_check.get('database') == database_identity
+            and cached_check.get('fingerprint') == _migrations_fingerprint(str(backend_dir))
+            and time.time() - cached_check.get('last_ok_ts', 0) < STARTUP_CACHE_TTL):
+        print_colored("  ✅ База данных актуальна (миграции не изменялись)", Colors.OKGREEN)
+        return True
+    
+    database_ok = False
+    
     # Проверка наличия миграций
     try:
-        os.chdir(backend_dir)
-        
         # Сначала проверим, работает ли Django вообще
         check_result = subprocess.run([
             sys.executable, 'manage.py', 'check'
-        ], capture_output=True, text=True)
+        ], cwd='backend', stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
         if check_result.returncode != 0:
             print_colored("  🔄 Первоначальная настройка Django...", Colors.WARNING)
             # Попробуем создать миграции и применить их
             subprocess.run([
                 sys.executable, 'manage.py', 'makemigrations'
-            ], capture_output=True)
+            ], cwd='backend', stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             migrate_result = subprocess.run([
                 sys.executable, 'manage.py', 'migrate'
-            ], capture_output=True, text=True)
+            ], cwd='backend', stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             
             if migrate_result.returncode == 0:
                 print_colored("  ✅ База данных инициализирована", Colors.OKGREEN)
+                database_ok = True
             else:
                 print_colored("  ⚠️  Возможны проблемы с базой данных, но продолжаем...", Colors.WARNING)
         else:
             # Django работает, проверяем миграции
             result = subprocess.run([
                 sys.executable, 'manage.py', 'showmigrations', '--plan'
-            ], capture_output=True, text=True)
+            ], cwd='backend', capture_output=True, text=True)
             
             if result.returncode == 0:
                 if 'UNAPPLIED' in result.stdout:
                     print_colored("  🔄 Применение миграций...", Colors.WARNING)
                     subprocess.run([
                         sys.executable, 'manage.py', 'migrate'
-                    ])
+                    ], cwd='backend')
                     print_colored("  ✅ Миграции применены", Colors.OKGREEN)
                 else:
                     print_colored("  ✅ База данных актуальна", Colors.OKGREEN)
+                database_ok = True
             else:
                 print_colored("  ⚠️  Не удалось проверить миграции, но продолжаем...", Colors.WARNING)
         
-        os.chdir('..')
+        if database_ok:
+            # Отпечаток и идентификатор снимаются заново: makemigrations мог добавить
+            # файлы, а migrate - создать базу
+            cache['database'] = {
+                'database': _database_identity(),
+                'fingerprint': _migrations_fingerprint(str(backend_dir)),
+                'last_ok_ts': time.time(),
+            }
+            save_startup_cache(cache)
         return True
         
     except Exception as e:
         print_colored(f"  ⚠️  Ошибка настройки базы данных: {e}", Colors.WARNING)
         print_colored("  ℹ️  Продолжаем без проверки миграций...", Colors.OKCYAN)
-        try:
-            os.chdir('..')
-        except:
-            pass
         return True  # Продолжаем выполнение
 
 def create_superuser():
@@ -186,8 +324,6 @@ def create_superuser():
     print_colored("\n👤 Создание администратора...", Colors.OKCYAN)
     
     try:
-        os.chdir('backend')
-        
         # Проверка существования суперпользователя
         check_script = """
 from django.contrib.auth import get_user_model
@@ -200,7 +336,7 @@ else:
         
         result = subprocess.run([
             sys.executable, 'manage.py', 'shell', '-c', check_script
-        ], capture_output=True, text=True, check=True)
+        ], cwd='backend', capture_output=True, text=True, check=True)
         
         if 'EXISTS' in result.stdout:
             print_colored("  ✅ Администратор уже существует", Colors.OKGREEN)
@@ -214,25 +350,26 @@ print('Superuser created: admin/admin123')
 """
             subprocess.run([
                 sys.executable, 'manage.py', 'shell', '-c', create_script
-            ], check=True)
+            ], cwd='backend', check=True)
             print_colored("  ✅ Администратор создан: admin/admin123", Colors.OKGREEN)
         
-        os.chdir('..')
-        
     except subprocess.CalledProcessError as e:
         print_colored(f"  ❌ Ошибка создания администратора: {e}", Colors.FAIL)
-        os.chdir('..')
 
 def install_dependencies():
     """Установка зависимостей"""
     print_colored("\n📦 Установка зависимостей...", Colors.OKCYAN)
     
-    # Python зависимости
+    # Python зависимости: без файла требований не запускаем pip вовсе
+    if not os.path.isfile(REQUIREMENTS_FILE):
+        print_colored(f"  ❌ Файл {REQUIREMENTS_FILE} не найден", Colors.FAIL)
+        return False
+    
     print_colored("  🐍 Установка Python пакетов...", Colors.OKCYAN)
     try:
         subprocess.run([
-            sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'
-        ], check=True, capture_output=True)
+            sys.executable, '-m', 'pip', 'install', '-r', REQUIREMENTS_FILE
+        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         print_colored("  ✅ Python пакеты установлены", Colors.OKGREEN)
     except subprocess.CalledProcessError:
         print_colored("  ❌ Ошибка установки Python пакетов", Colors.FAIL)
@@ -243,8 +380,7 @@ def install_dependencies():
     if frontend_dir.exists():
         # Проверяем доступность npm перед установкой
         try:
-            result = subprocess.run(['npm', '--version'], capture_output=True, text=True, shell=True)
-            if result.returncode == 0:
+            if _probe(('npm', '--version'))[0] == 0:
                 print_colored("  📦 Проверка Node.js пакетов...", Colors.OKCYAN)
                 
                 # Проверяем наличие node_modules
@@ -254,13 +390,11 @@ def install_dependencies():
                 else:
                     print_colored("  📦 Установка Node.js пакетов...", Colors.OKCYAN)
                     try:
-                        os.chdir(frontend_dir)
-                        subprocess.run(['npm', 'install'], check=True, capture_output=True)
+                        subprocess.run([_executable('npm'), 'install'], cwd=frontend_dir, check=True,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                         print_colored("  ✅ Node.js пакеты установлены", Colors.OKGREEN)
-                        os.chdir('..')
                     except subprocess.CalledProcessError:
                         print_colored("  ❌ Ошибка установки Node.js пакетов", Colors.FAIL)
-                        os.chdir('..')
                         print_colored("  ⚠️  Продолжаем без frontend пакетов", Colors.WARNING)
             else:
                 print_colored("  ⚠️  npm не найден, пропускаем установку Node.js пакетов", Colors.WARNING)
@@ -271,54 +405,223 @@ def install_dependencies():
     
     return True
 
+def _database_url():
+    """DATABASE_URL из окружения или из config/.env backend (как его читает django-environ)"""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url is None and BACKEND_ENV_FILE.exists():
+        for line in BACKEND_ENV_FILE.read_text(encoding='utf-8').splitlines():
+            key, sep, value = line.partition('=')
+            if sep and key.strip() == 'DATABASE_URL':
+                database_url = value.strip().strip('"\'')
+                break
+    return database_url
+
+def _sqlite_database_path():
+    """Путь к SQLite базе backend или None, если настроена другая СУБД"""
+    database_url = _database_url()
+    if not database_url:
+        return Path('backend') / 'metalqms.db'
+    if database_url.startswith('sqlite:///'):
+        path = Path(database_url[len('sqlite:///'):])
+        return path if path.is_absolute() else Path('backend') / path
+    return None
+
+def _database_identity():
+    """Идентификатор базы для кэша: пересозданная база считается новой"""
+    db_path = _sqlite_database_path()
+    if db_path is None:
+        return _database_url()
+    try:
+        return f"{db_path.resolve()}:{os.stat(db_path).st_ino}"
+    except OSError:
+        return None
+
+def _materials_exist():
+    """
+    Есть ли материалы в базе - прямым запросом к SQLite без запуска Django
+    
+    None - проверить напрямую не удалось (другая СУБД или нет таблицы)
+    """
+    db_path = _sqlite_database_path()
+    if db_path is None or not db_path.exists():
+        return None
+    try:
+        with closing(sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)) as connection:
+            return connection.execute('SELECT 1 FROM warehouse_material LIMIT 1').fetchone() is not None
+    except sqlite3.Error:
+        return None
+
 def load_test_data():
     """Загрузка тестовых данных"""
     print_colored("\n📊 Загрузка тестовых данных...", Colors.OKCYAN)
     
+    # Данные уже загружались в эту же базу - не проверяем повторно
+    cache = load_startup_cache()
+    database_identity = _database_identity()
+    if database_identity is not None and cache.get('test_data', {}).get('database') == database_identity:
+        print_colored("  ✅ Тестовые данные уже загружены", Colors.OKGREEN)
+        return
+    
+    # Нечего загружать - не тратим время на запуск Django
+    try:
+        fixture_size = os.stat(os.path.join('backend', TEST_DATA_FIXTURE)).st_size
+    except OSError:
+        print_colored(f"  ⚠️  Файл {TEST_DATA_FIXTURE} не найден, пропускаем загрузку", Colors.WARNING)
+        return
+    if fixture_size == 0:
+        print_colored(f"  ⚠️  Файл {TEST_DATA_FIXTURE} пуст, пропускаем загрузку", Colors.WARNING)
+        return
+    
     try:
-        os.chdir('backend')
+        materials_exist = _materials_exist()
         
-        # Проверка наличия данных
-        check_script = """
+        if materials_exist is None:
+            # Проверка наличия данных через Django
+            check_script = """
 from apps.warehouse.models import Material
 count = Material.objects.count()
 print(f'MATERIALS_COUNT:{count}')
 """
+            
+            result = subprocess.run([
+                sys.executable, 'manage.py', 'shell', '-c', check_script
+            ], cwd='backend', capture_output=True, text=True, check=True)
+            
+            count = 0
+            for line in result.stdout.split('\n'):
+                if 'MATERIALS_COUNT:' in line:
+                    count = int(line.split(':')[1])
+                    break
+            materials_exist = count > 0
         
-        result = subprocess.run([
-            sys.executable, 'manage.py', 'shell', '-c', check_script
-        ], capture_output=True, text=True, check=True)
-        
-        count = 0
-        for line in result.stdout.split('\n'):
-            if 'MATERIALS_COUNT:' in line:
-                count = int(line.split(':')[1])
-                break
-        
-        if count > 0:
-            print_colored(f"  ✅ Тестовые данные уже загружены ({count} материалов)", Colors.OKGREEN)
+        if materials_exist:
+            print_colored("  ✅ Тестовые данные уже загружены", Colors.OKGREEN)
         else:
             print_colored("  🔄 Создание тестовых данных...", Colors.WARNING)
             subprocess.run([
-                sys.executable, 'manage.py', 'loaddata', 'fixtures/test_data.json'
-            ], check=True)
+                sys.executable, 'manage.py', 'loaddata', TEST_DATA_FIXTURE
+            ], cwd='backend', check=True)
             print_colored("  ✅ Тестовые данные загружены", Colors.OKGREEN)
         
-        os.chdir('..')
+        # Идентификатор снимается после loaddata: база могла быть создана только что
+        database_identity = _database_identity()
+        if database_identity is not None:
+            cache = load_startup_cache()
+            cache['test_data'] = {'database': database_identity}
+            save_startup_cache(cache)
         
     except subprocess.CalledProcessError as e:
         print_colored(f"  ⚠️  Файл с тестовыми данными не найден, создаем базовые данные...", Colors.WARNING)
-        os.chdir('..')
+
+# Префиксы строк логов по классификации: цвет и подпись уже собраны
+_BACKEND_PREFIXES = {
+    'error': f"{Colors.FAIL}[{{}}] 🔴 BACKEND: ",
+    'warning': f"{Colors.WARNING}[{{}}] 🟡 BACKEND: ",
+    'request': f"{Colors.OKCYAN}[{{}}] 🌐 BACKEND: ",
+    'info': f"{Colors.OKGREEN}[{{}}] 🐍 BACKEND: ",
+}
+_FRONTEND_PREFIXES = {
+    'error': f"{Colors.FAIL}[{{}}] 🔴 FRONTEND: ",
+    'warning': f"{Colors.WARNING}[{{}}] 🟡 FRONTEND: ",
+    'ready': f"{Colors.OKGREEN}[{{}}] 🚀 FRONTEND: ",
+    'info': f"{Colors.OKCYAN}[{{}}] ⚛️  FRONTEND: ",
+}
+
+# Классификация строк backend одним проходом регулярного выражения
+# прямо по байтам из pipe; при нескольких совпадениях выигрывает более важный тип
+_BACKEND_LINE_RE = re.compile(rb'ERROR|EXCEPTION|WARNING|"GET|"POST', re.IGNORECASE)
+_BACKEND_LINE_KINDS = {
+    b'ERROR': 'error',
+    b'EXCEPTION': 'error',
+    b'WARNING': 'warning',
+    b'"GET': 'request',
+    b'"POST': 'request',
+}
+_BACKEND_KIND_PRIORITY = ('error', 'warning', 'request')
+
+def classify_backend_line(line):
+    """Тип строки лога backend (bytes): error, warning, request или info"""
+    kinds = {_BACKEND_LINE_KINDS[match.upper()] for match in _BACKEND_LINE_RE.findall(line)}
+    for kind in _BACKEND_KIND_PRIORITY:
+        if kind in kinds:
+            return kind
+    return 'info'
+
+def classify_frontend_line(line):
+    """Тип строки лога frontend (bytes): error, warning, ready или info"""
+    lower_line = line.lower()
+    if b'error' in lower_line or b'failed' in lower_line:
+        return 'error'
+    if b'warning' in lower_line:
+        return 'warning'
+    if b'Local:' in line or b'ready in' in lower_line:
+        return 'ready'
+    return 'info'
+
+# Пакетный вывод логов: не более 64 строк или 50 мс на одну запись в stdout
+LOG_BATCH_SIZE = 64
+LOG_BATCH_INTERVAL = 0.05
+
+# Максимальная длина строки лога в pipe (у StreamReader по умолчанию 64 КБ)
+PIPE_LINE_LIMIT = 1024 * 1024
 
 class ProcessManager:
-    """Менеджер процессов для backend и frontend"""
+    """
+    Менеджер процессов для backend и frontend
+    
+    Процессы запускаются через asyncio, а их логи читаются задачами
+    в одном цикле событий вместо отдельного потока на каждый процесс
+    """
     
     def __init__(self):
         self.processes = {}
+        self.monitors = []
         self.running = True
         self.frontend_running = False
+        self.log_buffer = []
+        self.log_flush = None
+    
+    def _log(self, prefixes, kind, line):
+        """Добавить строку лога в пакет вывода"""
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        self.log_buffer.append(f"{prefixes[kind].format(timestamp)}{line}{Colors.ENDC}\n")
+        if len(self.log_buffer) >= LOG_BATCH_SIZE:
+            self._flush_logs()
+        elif self.log_flush is None:
+            self.log_flush = asyncio.get_running_loop().call_later(LOG_BATCH_INTERVAL, self._flush_logs)
+    
+    def _flush_logs(self):
+        """Вывод накопленного пакета логов одной записью в stdout"""
+        if self.log_flush is not None:
+            self.log_flush.cancel()
+            self.log_flush = None
+        if self.log_buffer:
+            sys.stdout.write(''.join(self.log_buffer))
+            sys.stdout.flush()
+            self.log_buffer.clear()
+    
+    async def _monitor(self, stream, prefixes, classify):
+        """Чтение логов процесса построчно до закрытия pipe"""
+        while self.running:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Строка длиннее PIPE_LINE_LIMIT уже отброшена из буфера -
+                # продолжаем читать pipe, иначе процесс заблокируется на записи
+                self._log(prefixes, 'warning', f"начало строки лога длиннее {PIPE_LINE_LIMIT} байт пропущено")
+                continue
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                # Классифицируем прямо по байтам, декодируем только для вывода
+                self._log(prefixes, classify(line), line.decode('utf-8', 'replace'))
+    
+    def _start_monitor(self, process, prefixes, classify):
+        """Запуск задачи чтения логов процесса"""
+        self.monitors.append(asyncio.create_task(self._monitor(process.stdout, prefixes, classify)))
         
-    def start_backend(self):
+    async def start_backend(self):
         """Запуск Django backend"""
         print_colored("\n🐍 Запуск Django Backend...", Colors.OKCYAN)
         
@@ -332,33 +635,19 @@ class ProcessManager:
             env['PYTHONPATH'] = backend_path
         
         # Запускаем Django из правильной директории
-        backend_process = subprocess.Popen([
-            sys.executable, 'manage.py', 'runserver', '127.0.0.1:8000'
-        ], cwd='backend', stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-           universal_newlines=True, env=env, bufsize=1)
+        backend_process = await asyncio.create_subprocess_exec(
+            sys.executable, 'manage.py', 'runserver', '127.0.0.1:8000',
+            cwd='backend', stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            env=env, limit=PIPE_LINE_LIMIT
+        )
         
         self.processes['backend'] = backend_process
         
         # Мониторинг логов backend
-        def monitor_backend():
-            for line in iter(backend_process.stdout.readline, ''):
-                if not self.running:
-                    break
-                if line.strip():
-                    timestamp = datetime.now().strftime('%H:%M:%S')
-                    if 'ERROR' in line.upper() or 'EXCEPTION' in line.upper():
-                        print_colored(f"[{timestamp}] 🔴 BACKEND: {line.strip()}", Colors.FAIL)
-                    elif 'WARNING' in line.upper():
-                        print_colored(f"[{timestamp}] 🟡 BACKEND: {line.strip()}", Colors.WARNING)
-                    elif '"GET' in line or '"POST' in line:
-                        print_colored(f"[{timestamp}] 🌐 BACKEND: {line.strip()}", Colors.OKCYAN)
-                    else:
-                        print_colored(f"[{timestamp}] 🐍 BACKEND: {line.strip()}", Colors.OKGREEN)
-        
-        backend_thread = threading.Thread(target=monitor_backend, daemon=True)
-        backend_thread.start()
+        self._start_monitor(backend_process, _BACKEND_PREFIXES, classify_backend_line)
         
         print_colored("  ✅ Backend запущен на http://127.0.0.1:8000", Colors.OKGREEN)
+        return backend_process
         
     def check_frontend_health(self):
         """Проверка состояния frontend компонентов"""
@@ -384,7 +673,8 @@ class ProcessManager:
         else:
             print_colored("  ⚠️  node_modules не найден, устанавливаем зависимости...", Colors.WARNING)
             try:
-                subprocess.run(['npm', 'install'], cwd=frontend_dir, check=True, capture_output=True)
+                subprocess.run([_executable('npm'), 'install'], cwd=frontend_dir, check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 print_colored("  ✅ Зависимости установлены", Colors.OKGREEN)
             except subprocess.CalledProcessError:
                 print_colored("  ❌ Ошибка установки зависимостей", Colors.FAIL)
@@ -415,7 +705,7 @@ class ProcessManager:
         
         return True
     
-    def start_frontend(self):
+    async def start_frontend(self):
         """Запуск React frontend"""
         frontend_dir = Path('frontend')
         if not frontend_dir.exists():
@@ -423,17 +713,13 @@ class ProcessManager:
             return
         
         # Проверяем доступность npm перед запуском
-        try:
-            result = subprocess.run(['npm', '--version'], capture_output=True, text=True, shell=True)
-            if result.returncode != 0:
-                print_colored("  ⚠️  npm не найден, пропускаем запуск frontend", Colors.WARNING)
-                return
-        except FileNotFoundError:
+        if _probe(('npm', '--version'))[0] != 0:
             print_colored("  ⚠️  npm не найден, пропускаем запуск frontend", Colors.WARNING)
             return
         
-        # Выполняем проверку здоровья frontend
-        if not self.check_frontend_health():
+        # Выполняем проверку здоровья frontend (может ставить npm зависимости,
+        # поэтому в отдельном потоке, чтобы не задерживать логи backend)
+        if not await asyncio.to_thread(self.check_frontend_health):
             print_colored("  ❌ Frontend не готов к запуску", Colors.FAIL)
             return
             
@@ -445,10 +731,11 @@ class ProcessManager:
         env['NODE_ENV'] = 'development'
         
         try:
-            frontend_process = subprocess.Popen([
-                'npm', 'run', 'dev'
-            ], cwd=frontend_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-               universal_newlines=True, bufsize=1, env=env, shell=True)
+            frontend_process = await asyncio.create_subprocess_exec(
+                _executable('npm'), 'run', 'dev',
+                cwd=frontend_dir, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT, env=env, limit=PIPE_LINE_LIMIT
+            )
             
             self.processes['frontend'] = frontend_process
             self.frontend_running = True
@@ -461,43 +748,42 @@ class ProcessManager:
             return
         
         # Мониторинг логов frontend
-        def monitor_frontend():
-            for line in iter(frontend_process.stdout.readline, ''):
-                if not self.running:
-                    break
-                if line.strip():
-                    timestamp = datetime.now().strftime('%H:%M:%S')
-                    if 'error' in line.lower() or 'failed' in line.lower():
-                        print_colored(f"[{timestamp}] 🔴 FRONTEND: {line.strip()}", Colors.FAIL)
-                    elif 'warning' in line.lower():
-                        print_colored(f"[{timestamp}] 🟡 FRONTEND: {line.strip()}", Colors.WARNING)
-                    elif 'Local:' in line or 'ready in' in line.lower():
-                        print_colored(f"[{timestamp}] 🚀 FRONTEND: {line.strip()}", Colors.OKGREEN)
-                    else:
-                        print_colored(f"[{timestamp}] ⚛️  FRONTEND: {line.strip()}", Colors.OKCYAN)
-        
-        frontend_thread = threading.Thread(target=monitor_frontend, daemon=True)
-        frontend_thread.start()
-    
-    def stop_all(self):
+        self._start_monitor(frontend_process, _FRONTEND_PREFIXES, classify_frontend_line)
+        return frontend_process
+    
+    async def stop_all(self):
         """Остановка всех процессов"""
         print_colored("\n🛑 Остановка сервисов...", Colors.WARNING)
         self.running = False
         
         for name, process in self.processes.items():
-            if process and process.poll() is None:
+            if process and process.returncode is None:
                 print_colored(f"  🛑 Остановка {name}...", Colors.WARNING)
                 process.terminate()
                 try:
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
+                    await asyncio.wait_for(process.wait(), timeout=5)
+                except asyncio.TimeoutError:
                     process.kill()
+                    await process.wait()
                 print_colored(f"  ✅ {name} остановлен", Colors.OKGREEN)
+        
+        # Задачи чтения логов завершаются сами по закрытию pipe
+        await asyncio.gather(*self.monitors, return_exceptions=True)
+        self._flush_logs()
 
-def test_system_health():
-    """Тестирование работоспособности системы"""
-    print_colored("\n🏥 Проверка работоспособности системы...", Colors.OKCYAN)
-    
+# Проверка HTTP ответов (а не только открытых портов) - по флагу --deep-health
+DEEP_HEALTH = '--deep-health' in sys.argv
+
+def _port_alive(host, port, timeout=2):
+    """Порт принимает TCP соединения"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def _deep_health_check():
+    """Проверка HTTP ответов backend и frontend через requests"""
     # Проверка backend
     try:
         import requests
@@ -508,6 +794,7 @@ def test_system_health():
             print_colored(f"  ⚠️  Backend отвечает с кодом {response.status_code}", Colors.WARNING)
     except ImportError:
         print_colored("  ℹ️  requests не установлен, пропускаем проверку backend", Colors.OKCYAN)
+        return
     except Exception as e:
         print_colored(f"  ❌ Backend недоступен: {e}", Colors.FAIL)
     
@@ -518,14 +805,31 @@ def test_system_health():
             print_colored("  ✅ Frontend доступен и отвечает", Colors.OKGREEN)
         else:
             print_colored(f"  ⚠️  Frontend отвечает с кодом {response.status_code}", Colors.WARNING)
-    except ImportError:
-        pass  # Уже сообщили выше
-    except Exception as e:
+    except Exception:
         print_colored(f"  ⚠️  Frontend пока недоступен (может еще запускаться)", Colors.WARNING)
 
+def test_system_health():
+    """Тестирование работоспособности системы"""
+    print_colored("\n🏥 Проверка работоспособности системы...", Colors.OKCYAN)
+    
+    if DEEP_HEALTH:
+        _deep_health_check()
+        return
+    
+    # Для проверки живости достаточно TCP соединения с портом
+    if _port_alive('127.0.0.1', 8000):
+        print_colored("  ✅ Backend принимает соединения", Colors.OKGREEN)
+    else:
+        print_colored("  ❌ Backend недоступен: порт 8000 не отвечает", Colors.FAIL)
+    
+    if _port_alive('localhost', 3000):
+        print_colored("  ✅ Frontend принимает соединения", Colors.OKGREEN)
+    else:
+        print_colored("  ⚠️  Frontend пока недоступен (может еще запускаться)", Colors.WARNING)
 
-def show_info(frontend_running=True):
-    """Показать информацию о доступных URL"""
+
+def _build_info(frontend_running):
+    """Текст информации о доступных URL"""
     
     # Основная информация о backend
     info = """
@@ -578,7 +882,68 @@ def show_info(frontend_running=True):
 🔧 Monitoring:   Prometheus + Grafana готовы к запуску
     """
     
-    print_colored(info, Colors.OKCYAN)
+    return info
+
+# Оба варианта информации статичны - собираем их один раз
+_INFO_BYTES = {
+    frontend_running: _encode_colored(_build_info(frontend_running), Colors.OKCYAN)
+    for frontend_running in (True, False)
+}
+
+def show_info(frontend_running=True):
+    """Показать информацию о доступных URL"""
+    write_bytes(_INFO_BYTES[frontend_running])
+
+async def start_services(process_manager):
+    """Запуск backend и frontend с ожиданием их портов"""
+    # Запуск сервисов: ждем, пока порт начнет принимать соединения
+    await process_manager.start_backend()
+    if not await wait_port('127.0.0.1', 8000):
+        print_colored("  ⚠️  Backend не открыл порт 8000 за отведенное время", Colors.WARNING)
+    
+    await process_manager.start_frontend()
+    if process_manager.frontend_running and not await wait_port('localhost', 3000):
+        print_colored("  ⚠️  Frontend не открыл порт 3000 за отведенное время", Colors.WARNING)
+    
+    # Показать информацию
+    show_info(frontend_running=process_manager.frontend_running)
+    
+    # Тестирование системы (блокирующие соединения - в отдельном потоке)
+    await asyncio.to_thread(test_system_health)
+    
+    if process_manager.frontend_running:
+        print_colored("\n🎉 MetalQMS полностью запущен! Нажмите Ctrl+C для остановки...", Colors.OKGREEN)
+        print_colored("🌟 Система готова к работе: Frontend + Backend", Colors.OKGREEN)
+    else:
+        print_colored("\n🎉 MetalQMS Backend запущен! Нажмите Ctrl+C для остановки...", Colors.OKGREEN)
+        print_colored("💡 Для запуска frontend убедитесь что npm установлен", Colors.WARNING)
+
+def _install_stop_handler(loop, stop_event):
+    """Ctrl+C устанавливает событие остановки вместо KeyboardInterrupt"""
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop_event.set)
+    except NotImplementedError:
+        # Windows: add_signal_handler недоступен, цикл будит wakeup fd сигнала
+        signal.signal(signal.SIGINT, lambda signum, frame: loop.call_soon_threadsafe(stop_event.set))
+
+async def async_main():
+    """Запуск сервисов и ожидание Ctrl+C; логи всех процессов читаются в этом же цикле"""
+    process_manager = ProcessManager()
+    stop_event = asyncio.Event()
+    _install_stop_handler(asyncio.get_running_loop(), stop_event)
+    
+    # Ctrl+C во время запуска сервисов прерывает запуск
+    startup = asyncio.create_task(start_services(process_manager))
+    stop_wait = asyncio.create_task(stop_event.wait())
+    try:
+        await asyncio.wait((startup, stop_wait), return_when=asyncio.FIRST_COMPLETED)
+        if startup.done():
+            startup.result()
+            await stop_wait
+    finally:
+        startup.cancel()
+        stop_wait.cancel()
+        await process_manager.stop_all()
 
 def main():
     """Основная функция"""
@@ -605,46 +970,9 @@ def main():
     # Загрузка тестовых данных
     load_test_data()
     
-    # Создание менеджера процессов
-    process_manager = ProcessManager()
-    
-    def signal_handler(signum, frame):
-        process_manager.stop_all()
-        print_colored("\n👋 До свидания!", Colors.OKCYAN)
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    # Запуск сервисов
-    process_manager.start_backend()
-    time.sleep(3)  # Даем backend время запуститься
-    
-    process_manager.start_frontend()
-    time.sleep(3)  # Даем frontend время запуститься
-    
-    # Показать информацию
-    show_info(frontend_running=process_manager.frontend_running)
-    
-    # Пауза перед тестированием, чтобы сервисы успели запуститься
-    time.sleep(5)
-    
-    # Тестирование системы
-    test_system_health()
-    
-    if process_manager.frontend_running:
-        print_colored("\n🎉 MetalQMS полностью запущен! Нажмите Ctrl+C для остановки...", Colors.OKGREEN)
-        print_colored("🌟 Система готова к работе: Frontend + Backend", Colors.OKGREEN)
-    else:
-        print_colored("\n🎉 MetalQMS Backend запущен! Нажмите Ctrl+C для остановки...", Colors.OKGREEN)
-        print_colored("💡 Для запуска frontend убедитесь что npm установлен", Colors.WARNING)
-    
-    # Ожидание
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        process_manager.stop_all()
-        print_colored("\n👋 До свидания!", Colors.OKCYAN)
+    # Запуск и супервизия сервисов в одном цикле событий
+    asyncio.run(async_main())
+    print_colored("\n👋 До свидания!", Colors.OKCYAN)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file